@@ -1,12 +1,19 @@
+import functools
 import math
+import multiprocessing
+import os
+import threading
+import time
 import numpy as np
 import pandas as pd
 import yfinance as yf
-import scipy.stats as st
-from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from contextlib import closing
+from datetime import date
+from diskcache import Cache
+from numba import njit
 from statsmodels.tsa.stattools import adfuller
-from statsmodels.regression.linear_model import OLS
-from statsmodels.tools.tools import add_constant
 from statsmodels.tsa.vector_ar.vecm import coint_johansen
 import logging
 
@@ -14,6 +21,399 @@ logging.basicConfig(level=logging.INFO)
 logging.getLogger("yfinance").setLevel(logging.CRITICAL)
 logger = logging.getLogger("OmniSpreadEngine")
 
+# On-disk cache for network lookups (prices, industries), shared across scans and processes
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+
+# Bar lengths of the intraday intervals yfinance accepts, in seconds
+INTRADAY_INTERVAL_SECONDS = {
+    "1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800,
+    "60m": 3600, "90m": 5400, "1h": 3600,
+}
+
+
+def _bar_stamp(interval):
+    """
+    Cache stamp for the latest bar of an interval: the current bar bucket for
+    intraday intervals, today's date for daily and longer. Returns (stamp, ttl_seconds).
+    """
+    secs = INTRADAY_INTERVAL_SECONDS.get(interval)
+    if secs is None:
+        return date.today().isoformat(), 2 * 24 * 3600
+    return int(time.time() // secs), 2 * secs
+
+
+def bar_disk_cache(name, cache_if):
+    """
+    Memoize a function on disk under CACHE_DIR/name, keyed by its arguments plus the
+    current bar stamp of its interval= kwarg (see _bar_stamp), so entries go stale when
+    a new bar can exist. Results are only stored if cache_if(result, *args) is true.
+    The wrapper's is_cached(*args, **kwargs) reports a warm hit.
+    """
+    def decorator(func):
+        def make_key(args, kwargs):
+            stamp, ttl = _bar_stamp(kwargs.get("interval"))
+            return (stamp, args, tuple(sorted(kwargs.items()))), ttl
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key, ttl = make_key(args, kwargs)
+            with Cache(os.path.join(CACHE_DIR, name)) as cache:
+                result = cache.get(key)
+                if result is None:
+                    result = func(*args, **kwargs)
+                    if result is not None and cache_if(result, *args):
+                        cache.set(key, result, expire=ttl)
+            return result
+
+        def is_cached(*args, **kwargs):
+            with Cache(os.path.join(CACHE_DIR, name)) as cache:
+                return make_key(args, kwargs)[0] in cache
+
+        wrapper.is_cached = is_cached
+        return wrapper
+    return decorator
+
+
+def _complete_download(raw, tickers):
+    """True if every requested ticker came back with at least some Adj Close data."""
+    if raw.empty:
+        return False
+    try:
+        if isinstance(raw.columns, pd.MultiIndex):
+            adj = raw["Adj Close"].reindex(columns=list(tickers))
+        else:
+            adj = raw[["Adj Close"]]
+    except KeyError:
+        return False
+    return not adj.isna().all().any()
+
+
+@bar_disk_cache("downloads", cache_if=_complete_download)
+def _download(tickers, **kwargs):
+    return yf.download(list(tickers), **kwargs)
+
+
+# Process noise of the Kalman hedge-ratio random walk
+KALMAN_R = 1e-5
+
+# Relative gap between the OLS and Johansen hedge ratios below which the Kalman
+# beta path from the CADF leg is reused for a Johansen-only pass
+KALMAN_REUSE_RTOL = 0.01
+
+# Johansen 95% critical values for a bivariate system with det_order=0 (rows: r=0, r<=1),
+# as tabulated by statsmodels' coint_johansen (cvt[:, 1] / cvm[:, 1])
+JOHANSEN_TRACE_CV95 = np.array([15.4943, 3.8415])
+JOHANSEN_MAXEIG_CV95 = np.array([14.2639, 3.8415])
+
+
+@njit(cache=True)
+def _kalman_beta_nb(x, y, beta0, R):
+    """Scalar Kalman recursion for a time-varying hedge ratio (y ~ beta * x)."""
+    n = x.shape[0]
+    beta, P = beta0, 1.0
+    Q = np.var(y - beta0 * x)
+    betas = np.empty(n)
+    for t in range(n):
+        P += R
+        H = x[t]
+        S = H * P * H + Q
+        K = P * H / S
+        beta += K * (y[t] - H * beta)
+        P *= (1 - K * H)
+        betas[t] = beta
+    return betas
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _mc_inner(a_s, phi_s, sigma_s, r0, resid, hl, block_len, trade_sign, n_sims, seed):
+    """
+    For each ensemble draw m, simulate n_sims AR(1) spread paths of length hl from r0
+    with parameters (a_s[m], phi_s[m], sigma_s[m]) and count the paths that move in the
+    trade's favour at any step. Innovations are block-bootstrapped from resid, or drawn
+    from N(0, sigma_s[m]) if resid is empty. resid is the wrap-extended pool built by
+    _wrap_blocks: n residuals followed by their first block_len - 1, so a block starting
+    anywhere in the pool is one contiguous slice.
+    """
+    np.random.seed(seed)
+    n = resid.shape[0] - (block_len - 1)
+    eps = np.empty(hl, dtype=resid.dtype)
+    wins = np.zeros(a_s.shape[0], dtype=np.int64)
+    for m in range(a_s.shape[0]):
+        for _ in range(n_sims):
+            if resid.shape[0] > 0:
+                for b in range(0, hl, block_len):
+                    start = np.random.randint(0, n)
+                    k = min(block_len, hl - b)
+                    eps[b:b + k] = resid[start:start + k]
+            else:
+                for t in range(hl):
+                    eps[t] = np.random.normal(0.0, sigma_s[m])
+
+            level = r0
+            for t in range(hl):
+                level = a_s[m] + phi_s[m] * level + eps[t]
+                if trade_sign * (level - r0) > 0:
+                    wins[m] += 1
+                    break
+    return wins
+
+
+@njit(cache=True)
+def _lagged_diff_std_nb(ts, max_lag):
+    """np.std(ts[lag:] - ts[:-lag]) for lag = 2..max_lag, without allocating the differences."""
+    n = ts.shape[0]
+    tau = np.empty(max_lag - 1)
+    for lag in range(2, max_lag + 1):
+        m = n - lag
+        mean = 0.0
+        for t in range(m):
+            mean += ts[t + lag] - ts[t]
+        mean /= m
+        ss = 0.0
+        for t in range(m):
+            d = ts[t + lag] - ts[t] - mean
+            ss += d * d
+        tau[lag - 2] = np.sqrt(ss / m)
+    return tau
+
+
+# Pay the JIT compile cost once at import rather than on the first screened pair
+_kalman_beta_nb(np.ones(2), np.ones(2), 1.0, 1e-5)
+_mc_inner(np.zeros(1, np.float32), np.full(1, 0.5, np.float32), np.ones(1, np.float32),
+          np.float32(0.0), np.zeros(4, np.float32), 2, 1, 1, 1, 0)
+_lagged_diff_std_nb(np.arange(4.0), 3)
+
+
+# ========================
+#   NUMERICAL HELPERS
+# ========================
+
+def _slope1d(x, y):
+    """Closed-form least-squares slope of y on x (with intercept): cov(x, y) / var(x)."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    dx = x - x.mean()
+    return float((dx * (y - y.mean())).sum() / (dx * dx).sum())
+
+
+def _hurst(ts):
+    ts = np.ascontiguousarray(ts, dtype=np.float64)
+    if len(ts) < 20:
+        return np.nan
+    max_lag = min(100, len(ts) - 1)
+    lags = np.arange(2, max_lag + 1)
+    tau = _lagged_diff_std_nb(ts, max_lag)
+    if np.any(tau == 0):
+        return np.nan
+    return _slope1d(np.log(lags), np.log(tau)) * 2.0
+
+
+def _wrap_blocks(resid, block_len):
+    """Append the first block_len - 1 residuals (cycling if needed) so blocks never wrap."""
+    n = len(resid)
+    return resid.take(np.arange(n + block_len - 1) % n)
+
+
+def _johansen_2d(prices):
+    """
+    Johansen trace and max-eigenvalue statistics for a (T, 2) price array, equivalent
+    to coint_johansen(prices, det_order=0, k_ar_diff=1) without its VAR scaffolding.
+    Returns (trace, max_eig, eig, evec) with eigenvalues in descending order.
+    Raises LinAlgError if the moment matrices are singular.
+    """
+    x = prices - prices.mean(axis=0)
+    dx = np.diff(x, axis=0)
+    z = dx[:-1] - dx[:-1].mean(axis=0)          # lagged differences
+    d0 = dx[1:] - dx[1:].mean(axis=0)           # differences
+    lvl = x[1:-1] - x[1:-1].mean(axis=0)        # lagged levels
+
+    # Residuals of differences and lagged levels after partialling out the lagged differences
+    zz = z.T @ z
+    r0 = d0 - z @ np.linalg.solve(zz, z.T @ d0)
+    rk = lvl - z @ np.linalg.solve(zz, z.T @ lvl)
+
+    t = rk.shape[0]
+    s00 = r0.T @ r0 / t
+    sk0 = rk.T @ r0 / t
+    skk = rk.T @ rk / t
+    eig, evec = np.linalg.eig(np.linalg.solve(skk, sk0 @ np.linalg.solve(s00, sk0.T)))
+    order = np.argsort(eig.real)[::-1]
+    eig, evec = eig.real[order], evec.real[:, order]
+    if not np.all(np.isfinite(eig)) or np.any(eig >= 1):
+        raise np.linalg.LinAlgError("degenerate Johansen eigenvalues")
+
+    log_1m = np.log(1 - eig)
+    trace = -t * np.cumsum(log_1m[::-1])[::-1]
+    max_eig = -t * log_1m
+    return trace, max_eig, eig, evec
+
+
+# ========================
+#   PARALLEL SCREENING
+# ========================
+
+# Read-only inputs shared by every pair a worker screens, set once by _init_screen_worker
+_screen_state = {}
+
+
+def _init_screen_worker(prices, cols, industry_map, limits):
+    _screen_state["prices"] = prices
+    _screen_state["cols"] = cols
+    _screen_state["industry_map"] = industry_map
+    _screen_state["limits"] = limits
+
+
+def _screen_pair_star(pair):
+    x_sym, y_sym = pair
+    try:
+        prices, cols = _screen_state["prices"], _screen_state["cols"]
+        return _screen_pair(prices[:, cols[x_sym]], prices[:, cols[y_sym]],
+                            _screen_state["industry_map"], x_sym, y_sym,
+                            *_screen_state["limits"])
+    except Exception as e:
+        logger.warning(f"  ✗ {x_sym}/{y_sym} screening failed: {e}")
+        return None
+
+
+def _screen_pair(x, y, industry_map, x_sym, y_sym, z_limit, adf_p, hurst_limit,
+                 adf_lag_coef):
+    """
+    Run CADF + Johansen cointegration tests on a pair, given its two gap-free float64
+    price columns. Returns dict with pair metadata (series as arrays aligned with the
+    engine's price index) if cointegrated and passes filters, else None.
+    Module-level (no engine state) so it can run in a worker process.
+    """
+    if len(x) < 51:
+        return None
+
+    rx = x[1:] / x[:-1] - 1
+    ry = y[1:] / y[:-1] - 1
+
+    price_corr = round(float(np.corrcoef(x, y)[0, 1]), 2)
+    return_corr = round(float(np.corrcoef(rx, ry)[0, 1]), 2)
+    px = round(float(x[-1]), 2)
+    py = round(float(y[-1]), 2)
+
+    ix = industry_map.get(x_sym)
+    iy = industry_map.get(y_sym)
+
+    cadf_pass = False
+    johansen_pass = False
+    beta_ts = None
+    spread = None
+    beta0 = np.nan
+    beta0_j = None
+
+    # --- CADF with Kalman ---
+    try:
+        beta0 = _slope1d(x, y)
+        beta_ts = _kalman_beta_nb(x, y, beta0, KALMAN_R)
+        spread = y - beta_ts * x
+        try:
+            # Fixed lag from Schwert's short rule instead of an AIC search over every lag.
+            # Not equivalent: about 8% of decisions flip, so keep the search reachable.
+            adf_series = spread[~np.isnan(spread)]
+            if adf_lag_coef is None:
+                pval = adfuller(adf_series, autolag="AIC")[1]
+            else:
+                maxlag = int(np.ceil(adf_lag_coef * (len(adf_series) / 100) ** 0.25))
+                pval = adfuller(adf_series, maxlag=maxlag, autolag=None, regression="c")[1]
+        except Exception:
+            pval = 1.0
+        if pval < adf_p:
+            cadf_pass = True
+    except Exception:
+        cadf_pass = False
+
+    # --- Johansen ---
+    try:
+        pair_prices = np.column_stack([x, y])
+        try:
+            trace, maxe, eig, evec = _johansen_2d(pair_prices)
+        except np.linalg.LinAlgError:
+            jr = coint_johansen(pair_prices, det_order=0, k_ar_diff=1)
+            trace, maxe, eig, evec = jr.lr1, jr.lr2, jr.eig, jr.evec
+        ct, cm = JOHANSEN_TRACE_CV95, JOHANSEN_MAXEIG_CV95
+        if any(trace[i] > ct[i] and maxe[i] > cm[i] for i in range(2)):
+            johansen_pass = True
+            idx = int(np.argmax(eig))
+            v1, v2 = evec[:, idx]
+            beta0_j = -v1 / v2
+    except Exception:
+        johansen_pass = False
+        beta0_j = None
+
+    if not (cadf_pass or johansen_pass):
+        return None
+
+    # --- Final beta/spread selection ---
+    if cadf_pass:
+        pass_method = "CADF" if not johansen_pass else "Both"
+    else:
+        pass_method = "Johansen"
+        # Deliberate approximation: when the Johansen beta is within KALMAN_REUSE_RTOL of the
+        # OLS one, keep the CADF beta path instead of re-seeding the filter. The result is not
+        # identical, since Q = var(y - beta0 * x) depends on the seed. The reused spread is
+        # also the one that just failed ADF; only Johansen vouches for this pair.
+        if beta_ts is None or not np.isclose(beta0_j, beta0, rtol=KALMAN_REUSE_RTOL, atol=0.0):
+            try:
+                beta_ts = _kalman_beta_nb(x, y, float(beta0_j), KALMAN_R)
+                spread = y - beta_ts * x
+            except Exception:
+                return None
+
+    # --- Compute basic metrics for filtering ---
+    lag = np.concatenate([spread[:1], spread[:-1]])
+    ret = spread - lag
+    b = _slope1d(lag, ret) if np.std(lag) > 0 else 0
+    hl = max(1, int(round(-np.log(2) / b))) if b != 0 else 1
+    # Cap half-life to 1/3 of available data so the rolling window is meaningful.
+    # A huge hl (e.g. 500 bars on intraday data) would give a nearly constant mean
+    # and near-zero std, collapsing z-scores toward 0 and failing the abs(z)>2 filter.
+    max_hl = max(1, len(spread) // 3)
+    hl = min(hl, max_hl)
+
+    rolling = pd.Series(spread).rolling(window=hl, min_periods=max(1, hl // 2))
+    mavg = rolling.mean().to_numpy()
+    mstd = rolling.std().to_numpy()
+
+    z = round(float((spread[-1] - mavg[-1]) / mstd[-1]), 1) \
+        if (mstd[-1] and not np.isnan(mstd[-1]) and mstd[-1] != 0) else np.nan
+
+    hurst_val = _hurst(spread)
+
+    # --- Filter (matches Colab: abs(z) > limit AND hurst < limit) ---
+    if not math.isfinite(z) or abs(z) <= z_limit:
+        return None
+    if (not math.isfinite(hurst_val)) or hurst_val >= hurst_limit:
+        return None
+
+    qty = round(abs(float(beta_ts[-1])), 2)
+
+    # Strip .NS/.BO suffixes for cleaner display
+    x_disp = x_sym.replace(".NS", "").replace(".BO", "")
+    y_disp = y_sym.replace(".NS", "").replace(".BO", "")
+
+    if z > 0:
+        combo_str = f"Sell {qty} of {x_disp} ({px}, {ix or 'Unknown'})  &  Buy 1 of {y_disp} ({py}, {iy or 'Unknown'})"
+    else:
+        combo_str = f"Buy {qty} of {x_disp} ({px}, {ix or 'Unknown'})  &  Sell 1 of {y_disp} ({py}, {iy or 'Unknown'})"
+
+    return {
+        "x": x_sym, "y": y_sym,
+        "method": pass_method,
+        "cadf_pass": cadf_pass, "johansen_pass": johansen_pass,
+        "price_corr": price_corr, "return_corr": return_corr,
+        "px": px, "py": py,
+        "combo_str": combo_str,
+        "beta_ts": beta_ts, "spread": spread,
+        "half_life": hl,
+        "mavg": mavg, "mstd": mstd,
+        "hurst": hurst_val,
+        "industry_x": ix, "industry_y": iy,
+    }
+
 
 class OmniSpreadEngine:
     """
@@ -35,6 +435,24 @@ class OmniSpreadEngine:
     Z_SCORE_LIMIT = 2.0
     ADF_P_VALUE = 0.1
     HURST_LIMIT = 0.45
+    ADF_LAG_COEF = 4        # ADF lag = ceil(coef * (T/100)^(1/4)); None for the full AIC search
+    # Min return correlation for a pair to reach CADF/Johansen. A speed/recall trade-off:
+    # cointegrated pairs with noisy returns can sit well below 0.5. Set -1 to screen all.
+    PRESCREEN_CORR = 0.5
+
+    # --- Parallel screening / MC pipeline ---
+    MC_WORKERS = 2      # cores reserved for MC while screening is still running
+    SCREEN_WORKERS = max(1, (os.cpu_count() or 1) - MC_WORKERS)
+    SCREEN_CHUNKSIZE = 50
+    # Spawned workers each re-import this module (~2 s), while a pair screens in ~1.5 ms,
+    # so smaller universes are faster serially
+    MIN_PARALLEL_PAIRS = 2000
+
+    # --- Industry lookup ---
+    INDUSTRY_WORKERS = 32
+    INDUSTRY_TIMEOUT = 5.0                  # seconds per round of concurrent lookups
+    INDUSTRY_CACHE_TTL = 30 * 24 * 3600     # industries rarely change
+    INDUSTRY_UNKNOWN_TTL = 24 * 3600        # empty answers may just be a throttled .info
 
     def __init__(self, tickers, start_date=None, end_date=None, period="3y", interval="1d",
                  top_n=50):
@@ -46,6 +464,10 @@ class OmniSpreadEngine:
         self.top_n = top_n
         self.data = None
         self.industry_map = {}
+        # Cleaned prices as a (T, N) float64 matrix plus index/column lookups, set by fetch_data
+        self._P = None
+        self._idx = None
+        self._col = {}
 
     # ========================
     #   DATA FETCHING
@@ -53,7 +475,6 @@ class OmniSpreadEngine:
 
     def fetch_data(self):
         """Download price data in small batches to avoid yfinance throttling inside FastAPI."""
-        import time
         logger.info(f"Fetching data for {len(self.tickers)} tickers...")
 
         base_kwargs = {
@@ -71,7 +492,8 @@ class OmniSpreadEngine:
         data_frames = []
 
         for batch_idx, batch in enumerate(all_batches):
-            if batch_idx > 0:
+            batch_key = tuple(sorted(batch))
+            if batch_idx > 0 and not _download.is_cached(batch_key, **base_kwargs):
                 time.sleep(1.5)  # brief pause between batches to avoid rate-limiting
 
             batch_df = None
@@ -79,7 +501,7 @@ class OmniSpreadEngine:
                 if attempt > 0:
                     time.sleep(3 * attempt)
                 try:
-                    raw = yf.download(batch, **base_kwargs)
+                    raw = _download(batch_key, **base_kwargs)
                     if not raw.empty:
                         batch_df = raw
                         break
@@ -138,80 +560,63 @@ class OmniSpreadEngine:
         # Preserve original ticker ordering
         active = [s for s in self.tickers if s in self.data.columns]
         self.data = self.data[active]
+
+        # Column-major so each ticker's series (P[:, i]) is a contiguous float64 array.
+        # No NaNs remain after ffill/bfill, so pair screening needs no per-pair dropna.
+        self._P = np.asfortranarray(self.data.to_numpy(dtype=np.float64))
+        self._idx = self.data.index
+        self._col = {sym: i for i, sym in enumerate(active)}
         logger.info(f"Active tickers after cleaning: {len(active)} / {len(self.tickers)}")
         return active
 
-    def fetch_industries(self):
-        """Fetch industry classification for each ticker."""
-        for t in self.tickers:
-            try:
-                info = yf.Ticker(t).info
-                self.industry_map[t] = info.get("industry", "Unknown")
-            except Exception:
-                self.industry_map[t] = "Unknown"
-        logger.info(f"Fetched industries for {len(self.industry_map)} tickers")
-
-    # ========================
-    #   HELPER FUNCTIONS
-    # ========================
-
-    @staticmethod
-    def hurst(ts):
-        ts = np.array(ts)
-        if len(ts) < 20:
-            return np.nan
-        max_lag = min(100, len(ts) - 1)
-        lags = range(2, max_lag + 1)
-        tau = [np.std(ts[lag:] - ts[:-lag]) for lag in lags]
-        if any(t == 0 for t in tau):
-            return np.nan
-        return np.polyfit(np.log(list(lags)), np.log(tau), 1)[0] * 2.0
+    def fetch_industries(self, tickers):
+        """
+        Fetch industry classification for tickers, concurrently and cached on disk.
+        Tickers without a known industry map to None.
+        """
+        not_cached = object()
+        with Cache(os.path.join(CACHE_DIR, "industries")) as cache:
+            missing = []
+            for t in tickers:
+                industry = cache.get(t, default=not_cached)
+                if industry is not_cached:
+                    missing.append(t)
+                else:
+                    self.industry_map[t] = industry
 
-    @staticmethod
-    def kalman_beta_series(x, y, beta0, R=1e-5):
-        x_arr, y_arr = x.values, y.values
-        n = len(x_arr)
-        beta, P = beta0, 1.0
-        Q = np.var(y_arr - beta0 * x_arr)
-        betas = np.zeros(n)
-        for t in range(n):
-            P += R
-            H = x_arr[t]
-            resid = y_arr[t] - H * beta
-            S = H * P * H + Q
-            K = P * H / S
-            beta += K * resid
-            P *= (1 - K * H)
-            betas[t] = beta
-        return pd.Series(betas, index=x.index)
+            if missing:
+                # .info is a blocking HTTP round-trip per ticker, so overlap them on threads
+                pool = ThreadPoolExecutor(max_workers=min(self.INDUSTRY_WORKERS, len(missing)))
+                futures = {pool.submit(self._lookup_industry, t): t for t in missing}
+                rounds = math.ceil(len(missing) / self.INDUSTRY_WORKERS)
+                try:
+                    for fut in as_completed(futures, timeout=self.INDUSTRY_TIMEOUT * rounds):
+                        t = futures[fut]
+                        try:
+                            industry = fut.result()
+                        except Exception:
+                            continue
+                        self.industry_map[t] = industry
+                        ttl = self.INDUSTRY_CACHE_TTL if industry else self.INDUSTRY_UNKNOWN_TTL
+                        cache.set(t, industry, expire=ttl)
+                except FuturesTimeoutError:
+                    logger.warning(f"Industry lookup timed out for "
+                                   f"{sum(not f.done() for f in futures)} tickers")
+                finally:
+                    pool.shutdown(wait=False, cancel_futures=True)
+
+        for t in tickers:
+            self.industry_map.setdefault(t, None)
+        logger.info(f"Fetched industries for {len(tickers)} tickers "
+                    f"({len(tickers) - len(missing)} cached)")
 
     @staticmethod
-    def _block_bootstrap_errors(resid, horizon, rng, block_len):
-        n = len(resid)
-        if n == 0:
-            return rng.normal(0, 1, size=horizon)
-        block_len = max(1, int(block_len))
-        samples = []
-        while len(samples) < horizon:
-            start = rng.integers(0, n)
-            end = start + block_len
-            if end <= n:
-                block = resid[start:end]
-            else:
-                part1 = resid[start:n]
-                part2 = resid[0:(end % n)]
-                block = np.concatenate([part1, part2])
-            samples.extend(block.tolist())
-        return np.array(samples[:horizon])
+    def _lookup_industry(ticker):
+        return yf.Ticker(ticker).info.get("industry") or None
 
-    @staticmethod
-    def _simulate_path_ar1(a, phi, sigma, r0, eps_seq):
-        horizon = len(eps_seq)
-        path = np.empty(horizon + 1)
-        path[0] = r0
-        for t in range(1, horizon + 1):
-            path[t] = a + phi * path[t - 1] + eps_seq[t - 1]
-        return path
+    # ========================
+    #   HELPER FUNCTIONS
+    # ========================
 
     @staticmethod
     def _safe_float(val, default=0.0):
@@ -228,123 +633,44 @@ class OmniSpreadEngine:
         Returns dict with pair metadata if cointegrated and passes filters, else None.
         """
         try:
-            pair_prices = self.data[[x_sym, y_sym]].dropna()
-        except Exception:
-            return None
-
-        if len(pair_prices) < 50:
+            i, j = self._col[x_sym], self._col[y_sym]
+        except (KeyError, TypeError):
             return None
+        return _screen_pair(
+            self._P[:, i], self._P[:, j], self.industry_map, x_sym, y_sym,
+            self.Z_SCORE_LIMIT, self.ADF_P_VALUE, self.HURST_LIMIT, self.ADF_LAG_COEF,
+        )
 
-        pair_returns = pair_prices.pct_change().dropna()
-        if len(pair_returns) < 50:
-            return None
-
-        price_corr = round(pair_prices.corr().iloc[0, 1], 2)
-        return_corr = round(pair_returns.corr().iloc[0, 1], 2)
-        px = round(float(pair_prices[x_sym].iloc[-1]), 2)
-        py = round(float(pair_prices[y_sym].iloc[-1]), 2)
-
-        ix = self.industry_map.get(x_sym, "Unknown")
-        iy = self.industry_map.get(y_sym, "Unknown")
-
-        cadf_pass = False
-        johansen_pass = False
-        beta_ts = None
-        spread = None
-        beta0_j = None
-
-        # --- CADF with Kalman ---
-        try:
-            ols = OLS(pair_prices[y_sym], add_constant(pair_prices[x_sym])).fit()
-            beta0 = float(ols.params.iloc[1])
-            beta_ts = self.kalman_beta_series(pair_prices[x_sym], pair_prices[y_sym], beta0)
-            spread = pair_prices[y_sym] - beta_ts * pair_prices[x_sym]
-            try:
-                pval = adfuller(spread.dropna(), autolag="AIC")[1]
-            except Exception:
-                pval = 1.0
-            if pval < self.ADF_P_VALUE:
-                cadf_pass = True
-        except Exception:
-            cadf_pass = False
-
-        # --- Johansen ---
+    def _iter_screened(self, pairs):
+        """
+        Yield screen results (dict or None) for pairs, in order. Universes of at least
+        MIN_PARALLEL_PAIRS are fanned out over a process pool; stopping iteration early
+        cancels pending work.
+        """
+        workers = int(self.SCREEN_WORKERS or 1)
+        if workers <= 1 or len(pairs) < self.MIN_PARALLEL_PAIRS:
+            for x_sym, y_sym in pairs:
+                try:
+                    yield self.screen_pair(x_sym, y_sym)
+                except Exception as e:
+                    logger.warning(f"  ✗ {x_sym}/{y_sym} screening failed: {e}")
+                    yield None
+            return
+
+        # Spawn rather than fork: scans run on a server thread, and forking a threaded
+        # process can copy held locks (e.g. logging's) into the children
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_screen_worker,
+            initargs=(self._P, self._col, self.industry_map,
+                      (self.Z_SCORE_LIMIT, self.ADF_P_VALUE, self.HURST_LIMIT,
+                       self.ADF_LAG_COEF)),
+        )
         try:
-            jr = coint_johansen(pair_prices, det_order=0, k_ar_diff=1)
-            trace, ct = jr.lr1, jr.cvt[:, 1]
-            maxe, cm = jr.lr2, jr.cvm[:, 1]
-            if any(trace[i] > ct[i] and maxe[i] > cm[i] for i in range(2)):
-                johansen_pass = True
-                idx = int(np.argmax(jr.eig))
-                v1, v2 = jr.evec[:, idx]
-                beta0_j = -v1 / v2
-        except Exception:
-            johansen_pass = False
-            beta0_j = None
-
-        if not (cadf_pass or johansen_pass):
-            return None
-
-        # --- Final beta/spread selection ---
-        if cadf_pass:
-            pass_method = "CADF" if not johansen_pass else "Both"
-        else:
-            try:
-                beta_ts = self.kalman_beta_series(
-                    pair_prices[x_sym], pair_prices[y_sym], float(beta0_j)
-                )
-                spread = pair_prices[y_sym] - beta_ts * pair_prices[x_sym]
-                pass_method = "Johansen"
-            except Exception:
-                return None
-
-        # --- Compute basic metrics for filtering ---
-        lag = spread.shift(1).bfill()
-        ret = spread - lag
-        b = np.polyfit(lag, ret, 1)[0] if np.std(lag) > 0 else 0
-        hl = max(1, int(round(-np.log(2) / b))) if b != 0 else 1
-        # Cap half-life to 1/3 of available data so the rolling window is meaningful.
-        # A huge hl (e.g. 500 bars on intraday data) would give a nearly constant mean
-        # and near-zero std, collapsing z-scores toward 0 and failing the abs(z)>2 filter.
-        max_hl = max(1, len(spread) // 3)
-        hl = min(hl, max_hl)
-
-        mavg = spread.rolling(window=hl, min_periods=max(1, hl // 2)).mean()
-        mstd = spread.rolling(window=hl, min_periods=max(1, hl // 2)).std()
-
-        z = round(float((spread.iloc[-1] - mavg.iloc[-1]) / mstd.iloc[-1]), 1) \
-            if (mstd.iloc[-1] and not np.isnan(mstd.iloc[-1]) and mstd.iloc[-1] != 0) else np.nan
-
-        hurst_val = self.hurst(spread.values)
-
-        # --- Filter (matches Colab: abs(z) > limit AND hurst < limit) ---
-        if not math.isfinite(z) or abs(z) <= self.Z_SCORE_LIMIT:
-            return None
-        if (not math.isfinite(hurst_val)) or hurst_val >= self.HURST_LIMIT:
-            return None
-
-        qty = round(abs(float(beta_ts.iloc[-1])), 2)
-
-        # Strip .NS/.BO suffixes for cleaner display
-        x_disp = x_sym.replace(".NS", "").replace(".BO", "")
-        y_disp = y_sym.replace(".NS", "").replace(".BO", "")
-
-        if z > 0:
-            combo_str = f"Sell {qty} of {x_disp} ({px}, {ix})  &  Buy 1 of {y_disp} ({py}, {iy})"
-        else:
-            combo_str = f"Buy {qty} of {x_disp} ({px}, {ix})  &  Sell 1 of {y_disp} ({py}, {iy})"
-
-        return {
-            "x": x_sym, "y": y_sym,
-            "method": pass_method,
-            "cadf_pass": cadf_pass, "johansen_pass": johansen_pass,
-            "price_corr": price_corr, "return_corr": return_corr,
-            "px": px, "py": py,
-            "combo_str": combo_str,
-            "beta_ts": beta_ts, "spread": spread,
-            "half_life": hl,
-            "industry_x": ix, "industry_y": iy,
-        }
+            yield from pool.map(_screen_pair_star, pairs, chunksize=self.SCREEN_CHUNKSIZE)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
 
     # ========================
     #   CELL B: ENSEMBLE MONTE CARLO
@@ -357,8 +683,13 @@ class OmniSpreadEngine:
         """
         x, y = item["x"], item["y"]
         px, py = item["px"], item["py"]
+        # Screened series are float64 arrays aligned with the price index, which is
+        # only needed for dates at the end
         spread = item["spread"]
         beta_ts = item["beta_ts"]
+        mavg = item["mavg"]
+        mstd = item["mstd"]
+        dates = self._idx
         combo_str = item["combo_str"]
         method = item["method"]
         price_corr = item["price_corr"]
@@ -367,27 +698,28 @@ class OmniSpreadEngine:
         # Cap half-life to 1/3 of spread length (same as screen_pair) so rolling windows are meaningful
         hl = min(hl, max(1, len(spread) // 3))
 
-        industry_x = item.get("industry_x", "Unknown")
-        industry_y = item.get("industry_y", "Unknown")
-        same_sector = "Yes" if (industry_x != "Unknown" and industry_x == industry_y) else "No"
+        # Two unknown (None) industries are not evidence of the same sector
+        industry_x = item.get("industry_x")
+        industry_y = item.get("industry_y")
+        same_sector = "Yes" if (industry_x is not None and industry_x == industry_y) else "No"
 
         block_len = max(1, int(round(max(1, hl * self.BLOCK_LEN_FACTOR))))
 
         # --- Fit AR(1) ---
-        yvals = spread.values[1:]
-        Xvals = spread.values[:-1]
-        Xc = np.column_stack([np.ones(len(Xvals)), Xvals])
-        model = np.linalg.lstsq(Xc, yvals, rcond=None)[0]
-        a_hat, phi_hat = float(model[0]), float(model[1])
-        fitted = Xc.dot(model)
-        resid = yvals - fitted
+        yvals = spread[1:]
+        Xvals = spread[:-1]
+        phi_hat = _slope1d(Xvals, yvals)
+        a_hat = float(yvals.mean() - phi_hat * Xvals.mean())
+        resid = yvals - (a_hat + phi_hat * Xvals)
         sigma_hat = float(np.std(resid, ddof=1))
 
         n_obs = len(yvals)
-        sse = np.sum((yvals - fitted) ** 2)
+        sse = np.sum(resid ** 2)
         mse = sse / max(1, n_obs - 2)
         try:
-            XtX_inv = np.linalg.inv(Xc.T.dot(Xc))
+            # Gram matrix X'X of the design [1, x_{t-1}], built from sums
+            sx = Xvals.sum()
+            XtX_inv = np.linalg.inv(np.array([[n_obs, sx], [sx, Xvals.dot(Xvals)]]))
             se = np.sqrt(np.diag(XtX_inv) * mse)
             cov_params = np.diag(se ** 2)
         except Exception:
@@ -402,45 +734,45 @@ class OmniSpreadEngine:
         else:
             sims_per_local = self.SIMS_PER_DRAW
 
-        # --- Ensemble MC ---
-        p_draws = []
-        for m in range(int(self.ENSEMBLE_M)):
-            try:
-                params_sample = rng_main.multivariate_normal(mean=[a_hat, phi_hat], cov=cov_params)
-                a_s, phi_s = float(params_sample[0]), float(params_sample[1])
-            except Exception:
-                a_s = float(rng_main.normal(a_hat, se[0]))
-                phi_s = float(rng_main.normal(phi_hat, se[1]))
-
-            phi_s = max(min(phi_s, 0.999), -0.999)
-            df_chi = max(1, n_obs - 2)
-            chi2_draw = st.chi2.rvs(df_chi, random_state=rng_main)
-            sigma_s = sigma_hat * np.sqrt(df_chi / chi2_draw) if chi2_draw > 0 else sigma_hat
-
-            r0 = float(spread.iloc[-1])
-            mavg_val = float(spread.rolling(window=hl, min_periods=1).mean().iloc[-1])
-            mstd_val = float(spread.rolling(window=hl, min_periods=1).std().iloc[-1])
-            z = (r0 - mavg_val) / (mstd_val if mstd_val != 0 else 1e-12)
-            trade_sign = -1 if z > 0 else 1
-
-            wins = 0
-            for si in range(int(sims_per_local)):
-                if self.USE_BOOTSTRAP_RESID and len(resid) > 0:
-                    eps_seq = self._block_bootstrap_errors(resid, hl, rng_main, block_len)
-                else:
-                    eps_seq = rng_main.normal(0, sigma_s, size=hl)
-
-                path = self._simulate_path_ar1(a_s, phi_s, sigma_s, r0, eps_seq)
-                for t in range(1, hl + 1):
-                    delta = path[t] - r0
-                    pnl_currency = trade_sign * delta
-                    if pnl_currency > 0:
-                        wins += 1
-                        break
+        # An empty residual pool makes the MC kernel fall back to Gaussian innovations.
+        # Paths are simulated in float32: P(profit) needs ~3 digits, and it halves the
+        # memory traffic of the kernel. The AR(1) fit above stays in float64.
+        if self.USE_BOOTSTRAP_RESID and len(resid) > 0:
+            resid_pool = _wrap_blocks(resid.astype(np.float32), block_len)
+        else:
+            resid_pool = np.empty(0, dtype=np.float32)
 
-            p_draws.append(wins / sims_per_local if sims_per_local > 0 else 0.0)
+        # Rolling stats come from screening (same spread, same capped hl)
+        r0 = float(spread[-1])
+        mavg_val = float(mavg[-1])
+        mstd_val = float(mstd[-1])
+        z = (r0 - mavg_val) / (mstd_val if mstd_val != 0 else 1e-12)
+        trade_sign = -1 if z > 0 else 1
 
-        p_draws_clean = np.array([p for p in p_draws if not np.isnan(p)])
+        # --- Ensemble MC: sample all M parameter draws at once, then simulate M x S paths ---
+        n_draws = int(self.ENSEMBLE_M)
+        try:
+            params_draws = rng_main.multivariate_normal(
+                mean=[a_hat, phi_hat], cov=cov_params, size=n_draws
+            )
+        except Exception:
+            params_draws = rng_main.normal([a_hat, phi_hat], se, size=(n_draws, 2))
+        a_draws = np.ascontiguousarray(params_draws[:, 0])
+        phi_draws = np.clip(params_draws[:, 1], -0.999, 0.999)
+
+        df_chi = max(1, n_obs - 2)
+        chi2_draws = rng_main.chisquare(df_chi, size=n_draws)
+        with np.errstate(divide="ignore"):
+            sigma_draws = np.where(chi2_draws > 0, sigma_hat * np.sqrt(df_chi / chi2_draws), sigma_hat)
+
+        wins = _mc_inner(
+            a_draws.astype(np.float32), phi_draws.astype(np.float32), sigma_draws.astype(np.float32),
+            np.float32(r0), resid_pool, int(hl), int(block_len),
+            trade_sign, int(sims_per_local), int(rng_main.integers(0, 2**31 - 1)),
+        )
+        p_draws = wins / sims_per_local if sims_per_local > 0 else np.zeros(n_draws)
+
+        p_draws_clean = p_draws[~np.isnan(p_draws)]
         if p_draws_clean.size == 0:
             p_median_pct, p_low, p_high = 0.0, 0.0, 0.0
         else:
@@ -449,18 +781,13 @@ class OmniSpreadEngine:
             p_high = round(float(np.percentile(p_draws_clean, 95)) * 100.0, 1)
 
         # --- Display metrics ---
-        mp = max(1, hl // 2)
-        mavg = spread.rolling(window=hl, min_periods=mp).mean()
-        mstd = spread.rolling(window=hl, min_periods=mp).std()
-        z_display = round(float(
-            (spread.iloc[-1] - mavg.iloc[-1]) / (mstd.iloc[-1] if mstd.iloc[-1] != 0 else 1e-12)
-        ), 1)
-
-        move = round(float(-z_display * mstd.iloc[-1]), 2) if (not np.isnan(z_display) and mstd.iloc[-1]) else 0.0
-        unit = round(float(abs(beta_ts.iloc[-1] * px) + abs(py)), 2) if not np.isnan(beta_ts.iloc[-1]) else 0.0
+        z_display = round(float((r0 - mavg_val) / (mstd_val if mstd_val != 0 else 1e-12)), 1)
+
+        move = round(float(-z_display * mstd_val), 2) if (not np.isnan(z_display) and mstd_val) else 0.0
+        unit = round(float(abs(beta_ts[-1] * px) + abs(py)), 2) if not np.isnan(beta_ts[-1]) else 0.0
         exp_r = abs(round(float(move * 100 / unit), 1)) if unit else 0.0
 
-        hurst_val = self.hurst(spread.values)
+        hurst_val = item["hurst"]
 
         # --- Extreme Z in HL window ---
         highest_z_in_hl_flag = "No"
@@ -470,50 +797,45 @@ class OmniSpreadEngine:
 
         historical_z_scores = []
         if not np.isnan(z_display) and hl > 0 and len(spread) >= hl:
-            all_z = (spread - mavg) / mstd
-            z_window = all_z.iloc[-hl:].dropna()
-            
-            # Format for frontend chart: [{time: unix_timestamp, value: z}, ...]
-            for idx, val in all_z.dropna().items():
-                if math.isfinite(val):
-                    historical_z_scores.append({
-                        "time": int(idx.timestamp()),
-                        "value": round(float(val), 2)
-                    })
-            
-            # Ensure historical_z_scores are unique by timestamp and sorted
-            seen_times = set()
-            unique_z_scores = []
-            for item in historical_z_scores:
-                if item["time"] not in seen_times:
-                    unique_z_scores.append(item)
-                    seen_times.add(item["time"])
-            
-            historical_z_scores = sorted(unique_z_scores, key=lambda x: x["time"])
-
-            if not z_window.empty:
-                current_z_unrounded = float(all_z.iloc[-1])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                all_z = (spread - mavg) / mstd
+
+            # Format for frontend chart: [{time: unix_timestamp, value: z}, ...],
+            # unique by timestamp and sorted
+            finite = np.flatnonzero(np.isfinite(all_z))
+            times = np.array([int(t.timestamp()) for t in dates[finite]], dtype=np.int64)
+            times, first = np.unique(times, return_index=True)
+            historical_z_scores = [
+                {"time": int(t), "value": round(float(v), 2)}
+                for t, v in zip(times, all_z[finite[first]])
+            ]
+
+            offset = len(all_z) - hl
+            z_window = all_z[offset:]
+            in_window = np.flatnonzero(~np.isnan(z_window))
+
+            if in_window.size > 0:
+                current_z_unrounded = float(all_z[-1])
 
                 if current_z_unrounded > 0:
-                    extremum_z = float(z_window.max())
+                    extremum_z = float(z_window[in_window].max())
                     if np.isclose(current_z_unrounded, extremum_z):
                         highest_z_in_hl_flag = "Yes"
                 else:
-                    extremum_z = float(z_window.min())
+                    extremum_z = float(z_window[in_window].min())
                     if np.isclose(current_z_unrounded, extremum_z):
                         highest_z_in_hl_flag = "Yes"
 
                 if math.isfinite(extremum_z):
-                    idxs = z_window[np.isclose(z_window, extremum_z)].index
-                    date_str = idxs[0].strftime("%Y-%m-%d") if len(idxs) > 0 else "N/A"
+                    hits = in_window[np.isclose(z_window[in_window], extremum_z)]
+                    date_str = dates[offset + hits[0]].strftime("%Y-%m-%d") if hits.size > 0 else "N/A"
                     extreme_z_formatted = f"{round(extremum_z, 1)} ({date_str})"
 
                     # PnL since extreme Z
-                    if highest_z_in_hl_flag == "No" and len(idxs) > 0:
-                        extremum_date = idxs[0]
-                        spread_at_ext = float(spread.loc[extremum_date])
+                    if highest_z_in_hl_flag == "No" and hits.size > 0:
+                        spread_at_ext = float(spread[offset + hits[0]])
                         trade_sign_at_ext = -1 if extremum_z > 0 else 1
-                        hypothetical_pnl = -trade_sign_at_ext * (float(spread.iloc[-1]) - spread_at_ext)
+                        hypothetical_pnl = -trade_sign_at_ext * (r0 - spread_at_ext)
                         pnl_since_extremum = round(hypothetical_pnl, 2)
                         is_profitable_since_extremum = "Yes" if hypothetical_pnl > 0 else "No"
 
@@ -543,45 +865,75 @@ class OmniSpreadEngine:
     #   MAIN SCAN
     # ========================
 
-    def run_scan(self):
+    def run_scan(self, on_result=None):
+        """
+        Fetch data, screen all pairs and run the ensemble MC on each cointegrated pair.
+        If given, on_result is called with the sorted results so far each time a pair's
+        MC finishes, so callers can surface partial results while the scan runs.
+        """
         active_tickers = self.fetch_data()
         if len(active_tickers) < 2:
             logger.warning("Need at least 2 active tickers to form pairs")
             return []
 
-        # Fetch industries
-        self.fetch_industries()
-
-        # Cell A: screen for cointegrated pairs
-        pairs_all = list(combinations(active_tickers, 2))
-        logger.info(f"Screening {len(pairs_all)} pairs for cointegration...")
-
-        screened = []
-        for x, y in pairs_all:
-            if len(screened) >= self.top_n:
-                break
+        # Fetch industries only for tickers that survived cleaning
+        self.fetch_industries(active_tickers)
+
+        # Cell A: screen for cointegrated pairs, skipping pairs whose returns barely co-move
+        corr = np.corrcoef(self._P[1:] / self._P[:-1] - 1, rowvar=False)
+        ii, jj = np.nonzero(np.triu(corr > self.PRESCREEN_CORR, k=1))
+        pairs_all = [(active_tickers[i], active_tickers[j]) for i, j in zip(ii, jj)]
+        n_total = len(active_tickers) * (len(active_tickers) - 1) // 2
+        logger.info(f"Screening {len(pairs_all)}/{n_total} pairs for cointegration "
+                    f"(return corr > {self.PRESCREEN_CORR})...")
+
+        # Cells A + B, pipelined: each screened pair is handed to an MC thread while the
+        # process pool keeps screening. The MC kernel releases the GIL, so MC threads run
+        # on their own cores. MC gets MC_WORKERS slots until screening ends, then all cores.
+        results = []    # (screening order, MC result), appended in MC completion order
+        results_lock = threading.Lock()
+        n_cpu = os.cpu_count() or 1
+        mc_slots = threading.Semaphore(self.MC_WORKERS)
+
+        def run_mc(item):
+            with mc_slots:
+                return self.run_ensemble_mc(item)
+
+        def ranked():
+            # Ties in P(profit) keep screening order, so output doesn't depend on MC timing
+            return [r for _, r in sorted(results, key=lambda e: (-e[1]["prob_profit"], e[0]))]
+
+        def collect(fut, item, order):
             try:
-                result = self.screen_pair(x, y)
-                if result:
-                    screened.append(result)
-                    logger.info(f"  ✓ Cointegrated: {x}/{y} ({result['method']})")
+                mc_result = fut.result()
             except Exception as e:
-                logger.warning(f"  ✗ {x}/{y} screening failed: {e}")
-
-        logger.info(f"Found {len(screened)} cointegrated pairs. Running ensemble MC...")
-
-        # Cell B: ensemble MC on screened pairs
-        results = []
-        for i, item in enumerate(screened):
-            try:
-                mc_result = self.run_ensemble_mc(item)
-                results.append(mc_result)
+                logger.warning(f"  ✗ MC failed for {item['x']}/{item['y']}: {e}")
+                return
+            with results_lock:
+                results.append((order, mc_result))
                 logger.info(
-                    f"  [{i+1}/{len(screened)}] {mc_result['pair']} "
+                    f"  [{len(results)}] {mc_result['pair']} "
                     f"z={mc_result['z_score']} p={mc_result['prob_profit']}%"
                 )
-            except Exception as e:
-                logger.warning(f"  ✗ MC failed for {item['x']}/{item['y']}: {e}")
+                if on_result is not None:
+                    on_result(ranked())
+
+        n_screened = 0
+        with ThreadPoolExecutor(max_workers=max(self.MC_WORKERS, n_cpu)) as mc_pool:
+            with closing(self._iter_screened(pairs_all)) as screen_results:
+                for (x, y), item in zip(pairs_all, screen_results):
+                    if not item:
+                        continue
+                    n_screened += 1
+                    logger.info(f"  ✓ Cointegrated: {x}/{y} ({item['method']})")
+                    fut = mc_pool.submit(run_mc, item)
+                    fut.add_done_callback(functools.partial(collect, item=item, order=n_screened))
+                    if n_screened >= self.top_n:
+                        break
+
+            logger.info(f"Found {n_screened} cointegrated pairs. Finishing ensemble MC...")
+            for _ in range(max(0, n_cpu - self.MC_WORKERS)):
+                mc_slots.release()
 
         logger.info(f"Scan complete. {len(results)} pairs with full metrics.")
-        return sorted(results, key=lambda x: x["prob_profit"], reverse=True)
+        return ranked()
@@ -1,5 +1,8 @@
+import os
+import time
 import uuid
 import logging
+from diskcache import Cache
 from fastapi import FastAPI, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -19,8 +22,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory task store
-tasks: dict[str, dict] = {}
+# Task store on disk so every uvicorn worker sees the same tasks and they survive reloads
+TASK_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "tasks")
+TASK_TTL = 24 * 3600
+# A task still processing after this long is reported failed even if its worker looks alive
+TASK_STALE_AFTER = 3600
+tasks = Cache(TASK_STORE_DIR)
+
+
+def update_task(task_id: str, **fields):
+    with tasks.transact():
+        task = tasks.get(f"task:{task_id}", {"task_id": task_id})
+        task.update(fields)
+        tasks.set(f"task:{task_id}", task, expire=TASK_TTL)
+
+
+def is_stale(task: dict) -> bool:
+    """True if a processing task's worker process has died or it has run too long."""
+    if task.get("status") != "processing":
+        return False
+    if time.time() - task.get("started_at", 0) > TASK_STALE_AFTER:
+        return True
+    pid = task.get("pid")
+    if pid is None or pid == os.getpid() or os.name == "nt":
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass  # exists but owned by another user
+    return False
+
 
 # Pre-built ticker presets
 PRESETS = {
@@ -95,7 +128,8 @@ async def get_presets():
 @app.post("/scan")
 async def start_scan(request: ScanRequest, background_tasks: BackgroundTasks):
     task_id = str(uuid.uuid4())
-    tasks[task_id] = {"task_id": task_id, "status": "processing", "results": []}
+    update_task(task_id, status="processing", results=[],
+                started_at=time.time(), pid=os.getpid())
     background_tasks.add_task(run_engine, task_id, request)
     logger.info(f"Scan started: {task_id} | tickers={request.tickers} period={request.period}")
     return {"task_id": task_id}
@@ -103,9 +137,11 @@ async def start_scan(request: ScanRequest, background_tasks: BackgroundTasks):
 
 @app.get("/results/{task_id}")
 async def get_results(task_id: str):
-    task = tasks.get(task_id)
+    task = tasks.get(f"task:{task_id}")
     if not task:
         return {"task_id": task_id, "status": "not_found", "results": []}
+    if is_stale(task):
+        return {**task, "status": "failed", "error": "Scan worker stopped before finishing"}
     return task
 
 
@@ -118,11 +154,11 @@ def run_engine(task_id: str, request: ScanRequest):
             start_date=request.start_date,
             end_date=request.end_date,
         )
-        results = engine.run_scan()
-        tasks[task_id]["results"] = results
-        tasks[task_id]["status"] = "completed"
+        results = engine.run_scan(
+            on_result=lambda partial: update_task(task_id, results=partial)
+        )
+        update_task(task_id, status="completed", results=results)
         logger.info(f"Scan completed: {task_id} | {len(results)} pairs found")
     except Exception as e:
-        tasks[task_id]["status"] = "failed"
-        tasks[task_id]["error"] = str(e)
+        update_task(task_id, status="failed", error=str(e))
         logger.error(f"Scan failed: {task_id} | {e}")
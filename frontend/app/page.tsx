@@ -34,7 +34,12 @@ export default function Home() {
 
       const result = await pollResults(task_id, (update) => {
         if (update.status === "processing") {
-          setScanStatus("Analyzing cointegration & running Monte Carlo...");
+          setResults(update.results);
+          setScanStatus(
+            update.results.length > 0
+              ? `Analyzing cointegration & running Monte Carlo... ${update.results.length} pair${update.results.length > 1 ? "s" : ""} so far`
+              : "Analyzing cointegration & running Monte Carlo..."
+          );
         }
       });
 
@@ -160,7 +165,7 @@ export default function Home() {
       {/* Results */}
       <ResultsTable
         results={results}
-        isLoading={isScanning}
+        isLoading={isScanning && results.length === 0}
         onRowClick={setSelectedPair}
         interval={currentInterval}
       />
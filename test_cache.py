@@ -0,0 +1,105 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from diskcache import Cache
+
+# Import the engine the way the API server does, so both share one numba cache
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+import engine
+from engine import OmniSpreadEngine
+
+
+@pytest.fixture(autouse=True)
+def tmp_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, "CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _raw(tickers, empty=()):
+    """A yf.download-shaped frame; tickers in `empty` are all-NaN."""
+    idx = pd.date_range("2024-01-01", periods=5)
+    if len(tickers) == 1:
+        return pd.DataFrame({"Adj Close": np.arange(5.0), "Close": np.arange(5.0)}, index=idx)
+    cols = pd.MultiIndex.from_product([["Adj Close", "Close"], tickers])
+    raw = pd.DataFrame(np.ones((5, len(cols))), index=idx, columns=cols)
+    for t in empty:
+        raw.loc[:, (slice(None), t)] = np.nan
+    return raw
+
+
+@pytest.fixture
+def fake_download(monkeypatch):
+    calls = []
+
+    def download(tickers, **kwargs):
+        calls.append(list(tickers))
+        return download.result
+
+    download.result = None
+    download.calls = calls
+    monkeypatch.setattr(engine.yf, "download", download)
+    return download
+
+
+def test_complete_download_is_cached(fake_download):
+    fake_download.result = _raw(["A", "B"])
+    engine._download(("A", "B"), interval="1d")
+    assert engine._download.is_cached(("A", "B"), interval="1d")
+    engine._download(("A", "B"), interval="1d")
+    assert len(fake_download.calls) == 1
+
+
+def test_partial_download_is_not_cached(fake_download):
+    fake_download.result = _raw(["A", "B"], empty=["B"])
+    engine._download(("A", "B"), interval="1d")
+    assert not engine._download.is_cached(("A", "B"), interval="1d")
+    engine._download(("A", "B"), interval="1d")
+    assert len(fake_download.calls) == 2
+
+
+def test_single_ticker_download_is_cached(fake_download):
+    fake_download.result = _raw(["A"])
+    engine._download(("A",), interval="1d")
+    assert engine._download.is_cached(("A",), interval="1d")
+
+
+def test_intraday_key_moves_with_the_bar(fake_download, monkeypatch):
+    fake_download.result = _raw(["A", "B"])
+    now = 1_700_000_000.0
+    monkeypatch.setattr(engine.time, "time", lambda: now)
+    engine._download(("A", "B"), interval="5m")
+    assert engine._download.is_cached(("A", "B"), interval="5m")
+
+    now += 300
+    assert not engine._download.is_cached(("A", "B"), interval="5m")
+    engine._download(("A", "B"), interval="5m")
+    assert len(fake_download.calls) == 2
+
+
+def test_industry_lookup_timeout(tmp_cache_dir, monkeypatch):
+    release = threading.Event()
+
+    def lookup(ticker):
+        if ticker == "SLOW":
+            release.wait(5)
+        return "Banks"
+
+    monkeypatch.setattr(OmniSpreadEngine, "_lookup_industry", staticmethod(lookup))
+    monkeypatch.setattr(OmniSpreadEngine, "INDUSTRY_TIMEOUT", 0.2)
+    eng = OmniSpreadEngine(tickers=[])
+    try:
+        start = time.monotonic()
+        eng.fetch_industries(["FAST", "SLOW"])
+        assert time.monotonic() - start < 2
+    finally:
+        release.set()
+
+    assert eng.industry_map == {"FAST": "Banks", "SLOW": None}
+    with Cache(os.path.join(str(tmp_cache_dir), "industries")) as cache:
+        assert cache.get("FAST") == "Banks"
+        assert "SLOW" not in cache
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from statsmodels.tsa.vector_ar.vecm import coint_johansen
+
+# Import the engine the way the API server does, so both share one numba cache
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from engine import JOHANSEN_MAXEIG_CV95, JOHANSEN_TRACE_CV95, _johansen_2d
+
+
+def _series(seed, kind):
+    rng = np.random.default_rng(seed)
+    n = 500
+    x = 100 + np.cumsum(rng.normal(0, 1, n))
+    if kind == "coint":
+        spread = np.zeros(n)
+        for t in range(1, n):
+            spread[t] = 0.8 * spread[t - 1] + rng.normal(0, 1)
+        y = 5 + 1.3 * x + spread
+    else:
+        y = 50 + np.cumsum(rng.normal(0, 1, n))
+    return np.column_stack([x, y])
+
+
+CASES = [(seed, kind) for seed in (0, 1, 2) for kind in ("coint", "walk")]
+
+
+@pytest.mark.parametrize("seed,kind", CASES)
+def test_johansen_2d_matches_statsmodels(seed, kind):
+    prices = _series(seed, kind)
+    trace, max_eig, eig, evec = _johansen_2d(prices)
+    ref = coint_johansen(prices, 0, 1)
+
+    np.testing.assert_allclose(trace, ref.lr1, rtol=1e-8)
+    np.testing.assert_allclose(max_eig, ref.lr2, rtol=1e-8)
+    np.testing.assert_allclose(eig, ref.eig, rtol=1e-8)
+
+    # Hedge ratio taken from the leading eigenvector; its scale differs between the two
+    v1, v2 = evec[:, np.argmax(eig)]
+    r1, r2 = ref.evec[:, np.argmax(ref.eig)]
+    assert -v1 / v2 == pytest.approx(-r1 / r2, rel=1e-8)
+
+
+def test_johansen_critical_values_match_statsmodels():
+    ref = coint_johansen(_series(0, "coint"), 0, 1)
+    np.testing.assert_array_equal(JOHANSEN_TRACE_CV95, ref.cvt[:, 1])
+    np.testing.assert_array_equal(JOHANSEN_MAXEIG_CV95, ref.cvm[:, 1])